@@ -17,32 +17,33 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import argparse
+import concurrent.futures
+import functools
+import heapq
 import json
 import os
+import re
+import shlex
 import sys
 import subprocess
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from os.path import join
 
-from dateutil.relativedelta import relativedelta
-from googleapiclient.errors import HttpError
-from httplib2 import HttpLib2Error
-from oauth2client import client
-from oauth2client import clientsecrets
-
-from gcalendar import DEFAULT_CLIENT_ID, DEFAULT_CLIENT_SECRET, TOKEN_STORAGE_VERSION, VERSION
-from gcalendar.gcalendar import GCalendar
+from gcalendar import DEFAULT_CLIENT_ID, DEFAULT_CLIENT_SECRET, VERSION
+from gcalendar._paths import CONFIG_DIRECTORY, TOKEN_FILE_SUFFIX
 from gcalendar.notification import notify_events
 
-# the home folder
-HOME_DIRECTORY = os.environ.get('HOME') or os.path.expanduser('~')
+_TOKEN_FILE_SUFFIX_LENGTH = len(TOKEN_FILE_SUFFIX)
+
+# the local time zone, resolved once per process
+_LOCAL_TZ = datetime.now(timezone.utc).astimezone().tzinfo
 
-# ~/.config/gcalendar folder
-CONFIG_DIRECTORY = os.path.join(os.environ.get(
-    'XDG_CONFIG_HOME') or os.path.join(HOME_DIRECTORY, '.config'), 'gcalendar')
+# marker comment written above the gcalendar cron job
+GCAL_JOB_PREFIX = "# GCalendar notification job"
 
-TOKEN_FILE_SUFFIX = "_" + TOKEN_STORAGE_VERSION + ".dat"
+# the marker comment, the job line following it and any blank lines before them
+_GCAL_BLOCK_RE = re.compile(r"^\n*" + re.escape(GCAL_JOB_PREFIX) + r"\n[^\n]*(?:\n|\Z)", re.M)
 
 
 def validate_account_id(account_id):
@@ -73,11 +74,21 @@ def delete_if_exist(file_path):
 
 
 def list_accounts():
-    accounts = list()
-    for file in os.listdir(CONFIG_DIRECTORY):
-        if os.path.isfile(join(CONFIG_DIRECTORY, file)) and file.endswith(TOKEN_FILE_SUFFIX):
-            accounts.append(file.replace(TOKEN_FILE_SUFFIX, ""))
-    return accounts
+    with os.scandir(CONFIG_DIRECTORY) as entries:
+        # check the name first so is_file() is only consulted for token files
+        return [entry.name[:-_TOKEN_FILE_SUFFIX_LENGTH] for entry in entries
+                if entry.name.endswith(TOKEN_FILE_SUFFIX) and entry.is_file()]
+
+
+@functools.lru_cache(maxsize=64)
+def is_authorized(storage_path, mtime_ns):
+    """
+    Check whether the token stored in storage_path is valid.
+    The modification time of the token file is part of the cache key.
+    """
+    from gcalendar.gcalendar import GCalendar
+
+    return GCalendar.is_authorized(storage_path)
 
 
 def reset_account(account_id, storage_path):
@@ -117,19 +128,31 @@ def print_list(obj_list, output_type):
 
 def print_events(events, output_type):
     if output_type == "txt":
-        for event in events:
-            print("%s:%s - %s:%s\t%s\t%s\t%s" % (
-                event["start_date"], event["start_time"], event["end_date"], event["end_time"], event["summary"],
-                event["location"], event["status"]))
+        # write all events at once instead of one print per event
+        sys.stdout.write("".join("%s:%s - %s:%s\t%s\t%s\t%s\n" % (
+            event["start_date"], event["start_time"], event["end_date"], event["end_time"], event["summary"],
+            event["location"], event["status"]) for event in events))
     elif output_type == "json":
-        print(json.dumps(events))
+        print(json.dumps(events, separators=(",", ":")))
 
 
 def handle_exception(client_id, client_secret, account_id, storage_path, output, debug, function):
+    from gcalendar.gcalendar import GCalendar
+
+    return call_and_handle_exception(
+        output, debug, lambda: function(GCalendar(client_id, client_secret, account_id, storage_path)))
+
+
+def call_and_handle_exception(output, debug, function):
+    # Google client libraries are slow to import, so load them only when talking to Google Calendar
+    from googleapiclient.errors import HttpError
+    from httplib2 import HttpLib2Error
+    from oauth2client import client
+    from oauth2client import clientsecrets
+
     failed = False
     try:
-        g_calendar = GCalendar(client_id, client_secret, account_id, storage_path)
-        return failed, function(g_calendar)
+        return failed, function()
 
     except clientsecrets.InvalidClientSecretsError as ex:
         handle_error(ex, "Invalid Client Secrets", output, debug)
@@ -162,8 +185,13 @@ def handle_exception(client_id, client_secret, account_id, storage_path, output,
     return failed, None
 
 
-def setup_crontab(interval, notify_minutes, account, calendars, debug):
-    """Setup or update a crontab entry for calendar notifications"""
+def _write_crontab(text):
+    """Install text as the current user's crontab"""
+    subprocess.run(['crontab', '-'], input=text, text=True, check=True)
+
+
+def setup_crontab(interval, notify_minutes, accounts, calendars, debug):
+    """Setup or update the crontab entries for calendar notifications, one per account"""
     # Get the current user's crontab
     try:
         result = subprocess.run(['crontab', '-l'], capture_output=True, text=True)
@@ -173,51 +201,36 @@ def setup_crontab(interval, notify_minutes, account, calendars, debug):
         current_crontab = ""
     
     # Check if our cronjob is already there
-    gcal_job_prefix = "# GCalendar notification job"
-    if gcal_job_prefix in current_crontab:
+    if GCAL_JOB_PREFIX in current_crontab:
         print("Existing gcalendar crontab entry found. Updating...")
         # Remove existing GCalendar crontab entries
-        new_lines = []
-        skip_line = False
-        for line in current_crontab.splitlines():
-            if line.startswith(gcal_job_prefix):
-                skip_line = True
-                continue
-            if skip_line and line.strip() and not line.startswith('#'):
-                skip_line = False
-            if not skip_line:
-                new_lines.append(line)
-        
-        current_crontab = "\n".join(new_lines)
-    
-    # Build the calendar argument string
-    calendar_arg = " ".join([f'"{cal}"' for cal in calendars]) if calendars != ["*"] else "*"
+        current_crontab = _GCAL_BLOCK_RE.sub("", current_crontab)
     
-    # Build the command with all options
-    notify_cmd = f"gcalendar-notify --notify {notify_minutes} --account {account}"
-    if calendar_arg != "*":
-        notify_cmd += f" --calendar {calendar_arg}"
+    # Build the options shared by all accounts
+    option_parts = []
+    if calendars != ["*"]:
+        # Quote calendar names so that spaces and quotes survive the shell run by cron,
+        # and escape % which cron would otherwise turn into a newline
+        option_parts.append("--calendar")
+        option_parts.extend(shlex.quote(cal).replace("%", "\\%") for cal in calendars)
     if debug:
-        notify_cmd += " --debug"
+        option_parts.append("--debug")
     
-    # Add the new cronjob
-    new_crontab = current_crontab.rstrip() + f"\n\n{gcal_job_prefix}\n*/{interval} * * * * {notify_cmd}\n"
-    
-    # Write to a temporary file
-    temp_crontab = os.path.join(HOME_DIRECTORY, ".gcalendar_crontab_temp")
-    with open(temp_crontab, "w") as f:
-        f.write(new_crontab)
+    # Add a new cronjob for each account
+    new_crontab = current_crontab.rstrip()
+    for account in accounts:
+        notify_cmd = " ".join(["gcalendar-notify", "--notify", str(notify_minutes), "--account", account]
+                              + option_parts)
+        new_crontab += f"\n\n{GCAL_JOB_PREFIX}\n*/{interval} * * * * {notify_cmd}"
+    new_crontab += "\n"
     
     # Install the new crontab
     try:
-        subprocess.run(['crontab', temp_crontab], check=True)
+        _write_crontab(new_crontab)
         print(f"Successfully set up crontab to check every {interval} minutes for upcoming events")
         print(f"Will notify you {notify_minutes} minutes before each event")
     except subprocess.CalledProcessError as e:
         print(f"Failed to set up crontab: {e}")
-    
-    # Clean up
-    os.remove(temp_crontab)
 
 
 def remove_crontab():
@@ -226,36 +239,14 @@ def remove_crontab():
         result = subprocess.run(['crontab', '-l'], capture_output=True, text=True)
         current_crontab = result.stdout
         
-        if "# GCalendar notification job" not in current_crontab:
+        if GCAL_JOB_PREFIX not in current_crontab:
             print("No gcalendar crontab entry found")
             return
         
         # Remove GCalendar crontab entries
-        new_lines = []
-        skip_line = False
-        for line in current_crontab.splitlines():
-            if line.startswith("# GCalendar notification job"):
-                skip_line = True
-                continue
-            if skip_line and line.strip() and not line.startswith('#'):
-                skip_line = False
-            if not skip_line:
-                new_lines.append(line)
-        
-        new_crontab = "\n".join(new_lines)
-        
-        # Write to a temporary file
-        temp_crontab = os.path.join(HOME_DIRECTORY, ".gcalendar_crontab_temp")
-        with open(temp_crontab, "w") as f:
-            f.write(new_crontab)
-        
-        # Install the new crontab
-        subprocess.run(['crontab', temp_crontab], check=True)
+        _write_crontab(_GCAL_BLOCK_RE.sub("", current_crontab))
         print("Successfully removed gcalendar crontab entry")
         
-        # Clean up
-        os.remove(temp_crontab)
-        
     except subprocess.CalledProcessError as e:
         print(f"Failed to remove crontab: {e}")
 
@@ -284,7 +275,7 @@ def process_request(account_ids, args):
         for account_id in account_ids:
             storage_path = join(CONFIG_DIRECTORY, account_id + TOKEN_FILE_SUFFIX)
             if os.path.exists(storage_path):
-                if GCalendar.is_authorized(storage_path):
+                if is_authorized(storage_path, os.stat(storage_path).st_mtime_ns):
                     status = "Authorized"
                 else:
                     status = "Token Expired"
@@ -315,14 +306,13 @@ def process_request(account_ids, args):
             print("Error: Cron interval must be greater than 0")
             return 1
 
-        for account_id in account_ids:
-            setup_crontab(
-                interval,
-                notify_mins,
-                account_id,
-                args.calendar,
-                args.debug
-            )
+        setup_crontab(
+            interval,
+            notify_mins,
+            account_ids,
+            args.calendar,
+            args.debug
+        )
         return 0
     elif args.remove_cron:
         # Remove the crontab entry
@@ -333,24 +323,42 @@ def process_request(account_ids, args):
         no_of_days = int(args.no_of_days)
         selected_calendars = [x.lower() for x in args.calendar]
         since = args.since
-        current_time = datetime.now(timezone.utc).astimezone()
-        time_zone = current_time.tzinfo
+        time_zone = _LOCAL_TZ
+        current_time = datetime.now(_LOCAL_TZ)
         if since is None:
             since = current_time
         start_time = str(since.isoformat())
-        end_time = str((since + relativedelta(days=no_of_days)).isoformat())
-        events = []
+        end_time = str((since + timedelta(days=no_of_days)).isoformat())
+        # Authorize the accounts one at a time in the main thread since an
+        # account without a valid token starts an interactive browser flow
+        g_calendars = []
         for account_id in account_ids:
             storage_path = join(CONFIG_DIRECTORY, account_id + TOKEN_FILE_SUFFIX)
             failed, result = handle_exception(client_id, client_secret, account_id, storage_path, args.output,
-                                              args.debug,
-                                              lambda cal: cal.list_events(selected_calendars, start_time, end_time,
-                                                                          time_zone))
+                                              args.debug, lambda cal: cal)
             if failed:
                 return -1
             else:
-                events.extend(result)
-        events = sorted(events, key=lambda event: event["start_date"] + event["start_time"])
+                g_calendars.append(result)
+
+        # Fetch the events in parallel since the time is spent waiting for Google Calendar
+        account_events = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(8, len(g_calendars)))) as executor:
+            futures = [executor.submit(call_and_handle_exception, args.output, args.debug,
+                                       functools.partial(g_calendar.list_events, selected_calendars, start_time,
+                                                         end_time, time_zone))
+                       for g_calendar in g_calendars]
+            for future in futures:
+                failed, result = future.result()
+                if failed:
+                    # Do not start the fetches that are still queued
+                    for pending in futures:
+                        pending.cancel()
+                    return -1
+                else:
+                    account_events.append(result)
+        # list_events returns each account's events already sorted
+        events = list(heapq.merge(*account_events, key=lambda event: (event["start_date"], event["start_time"])))
         
         # Handle notifications if requested
         if args.notify:
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# gcalendar is a tool to read Google Calendar events from your terminal.
+
+# Copyright (C) 2023  Gobinath
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+from gcalendar import TOKEN_STORAGE_VERSION
+
+# the home folder
+HOME_DIRECTORY = os.environ.get('HOME') or os.path.expanduser('~')
+
+# ~/.config/gcalendar folder
+CONFIG_DIRECTORY = os.path.join(os.environ.get(
+    'XDG_CONFIG_HOME') or os.path.join(HOME_DIRECTORY, '.config'), 'gcalendar')
+
+TOKEN_FILE_SUFFIX = "_" + TOKEN_STORAGE_VERSION + ".dat"
+
+# ~/.local/share/gcalendar folder
+DATA_DIRECTORY = os.path.join(
+    os.environ.get('XDG_DATA_HOME') or os.path.join(HOME_DIRECTORY, '.local/share'), 'gcalendar')
+
+# file to track already notified events to prevent duplicates
+NOTIFIED_EVENTS_FILE = os.path.join(DATA_DIRECTORY, 'notified_events.tsv')
+
+# JSON file used by older versions instead of NOTIFIED_EVENTS_FILE
+LEGACY_NOTIFIED_EVENTS_FILE = os.path.join(DATA_DIRECTORY, 'notified_events.json')
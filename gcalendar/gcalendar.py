@@ -93,7 +93,7 @@ class GCalendar:
             if not page_token:
                 break
 
-        return sorted(calendar_events, key=lambda event: event["start_date"] + event["start_time"])
+        return sorted(calendar_events, key=lambda event: (event["start_date"], event["start_time"]))
 
     def retrieve_events(self, calendar_id, calendar_color, start_time, end_time, time_zone):
         page_token = None
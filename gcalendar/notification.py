@@ -20,14 +20,34 @@ import subprocess
 import logging
 import os
 import json
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 
-# File to track already notified events to prevent duplicates
-NOTIFIED_EVENTS_FILE = os.path.join(
-    os.environ.get('XDG_DATA_HOME') or os.path.join(os.environ.get('HOME') or os.path.expanduser('~'), '.local/share'),
-    'gcalendar/notified_events.json'
-)
+from gcalendar._paths import NOTIFIED_EVENTS_FILE, LEGACY_NOTIFIED_EVENTS_FILE
+
+# Minimum number of seconds between two clean ups of the notified events file
+CLEAN_UP_INTERVAL = 60 * 60
+
+# (file version, notified events) as last read or written by this process
+_notified_events_cache = None
+
+def _escape_separators(event_id):
+    """Replace the field and record separators of the notified events file in event_id"""
+    return event_id.replace("\t", " ").replace("\n", " ").replace("\r", " ")
+
+def _fast_parse(start_date, start_time):
+    """
+    Parse a "%Y-%m-%d" date and a "%H:%M" time into a datetime
+
+    Slices the fixed-width fields directly and falls back to strptime
+    for anything that does not fit the expected layout.
+    """
+    try:
+        return datetime(int(start_date[0:4]), int(start_date[5:7]), int(start_date[8:10]),
+                        int(start_time[0:2]), int(start_time[3:5]))
+    except ValueError:
+        return datetime.strptime(f"{start_date} {start_time}", "%Y-%m-%d %H:%M")
 
 def notify_events(events, notify_minutes):
     """
@@ -40,40 +60,60 @@ def notify_events(events, notify_minutes):
     now = datetime.now()
     notification_window = now + timedelta(minutes=notify_minutes)
     
+    # Dates and times are zero padded, so the strings compare in chronological order
+    now_str = now.strftime("%Y-%m-%d %H:%M")
+    notification_window_str = notification_window.strftime("%Y-%m-%d %H:%M")
+    candidate_events = []
+    for event in events:
+        start_time = event.get("start_time", "")
+        # Skip all-day events
+        if start_time == "00:00" and event.get("end_time") == "00:00":
+            continue
+        start_datetime_str = f"{event.get('start_date', '')} {start_time}"
+        if now_str <= start_datetime_str <= notification_window_str:
+            candidate_events.append((event, start_datetime_str))
+    
+    clean_up_due = is_clean_up_due()
+    if not candidate_events and not clean_up_due:
+        # Nothing to notify and nothing to clean up
+        return
+    
     # Load previously notified events
     notified_events = load_notified_events()
     
     # Filter events that start within the notification window
     upcoming_events = []
-    for event in events:
+    new_notified_events = {}
+    for event, start_datetime_str in candidate_events:
         try:
-            # Handle events with specific times (not all-day events)
-            if event["start_time"] != "00:00" or event["end_time"] != "00:00":
-                start_datetime_str = f"{event['start_date']} {event['start_time']}"
-                start_datetime = datetime.strptime(start_datetime_str, "%Y-%m-%d %H:%M")
-                
-                # Check if event starts between now and notification window
-                if now <= start_datetime <= notification_window:
-                    # Create a unique ID for the event to prevent duplicate notifications
-                    event_id = f"{event.get('summary', 'Unnamed')}-{start_datetime_str}"
-                    
-                    # Only add if we haven't notified about this event already
-                    if event_id not in notified_events:
-                        upcoming_events.append(event)
-                        notified_events[event_id] = datetime.now().isoformat()
+            start_datetime = _fast_parse(event["start_date"], event["start_time"])
         except (ValueError, KeyError) as e:
             logging.warning(f"Error processing event for notification: {e}")
             continue
+        
+        # Check if event starts between now and notification window
+        if not now <= start_datetime <= notification_window:
+            continue
+        
+        # Create a unique ID for the event to prevent duplicate notifications
+        event_id = _escape_separators(f"{event.get('summary', 'Unnamed')}-{start_datetime_str}")
+        
+        # Only add if we haven't notified about this event already
+        if event_id not in notified_events:
+            upcoming_events.append(event)
+            notified_events[event_id] = new_notified_events[event_id] = int(time.time())
     
     # Send notifications for upcoming events
     for event in upcoming_events:
         send_notification(event)
     
-    # Clean up old notified events (keep only events from the last 24 hours)
-    clean_notified_events(notified_events)
+    # Record the newly notified events
+    append_notified_events(new_notified_events)
     
-    # Save updated notified events
-    save_notified_events(notified_events)
+    if clean_up_due:
+        # Clean up old notified events (keep only events from the last 24 hours)
+        clean_notified_events(notified_events)
+        save_notified_events(notified_events)
 
 def send_notification(event):
     """
@@ -90,20 +130,11 @@ def send_notification(event):
     
     # Create notification message
     title = f"Upcoming Calendar Event: {summary}"
-    message_parts = []
-    
-    message_parts.append(f"Date: {start_date}")
-    message_parts.append(f"Time: {start_time}")
-    
-    if location:
-        message_parts.append(f"Location: {location}")
-    
-    if description:
-        # Truncate description if it's too long
-        short_desc = description[:100] + "..." if len(description) > 100 else description
-        message_parts.append(f"Details: {short_desc}")
-    
-    message = "\n".join(message_parts)
+    # Truncate description if it's too long
+    short_desc = description[:100] + "..." if len(description) > 100 else description
+    message = (f"Date: {start_date}\nTime: {start_time}"
+               + (f"\nLocation: {location}" if location else "")
+               + (f"\nDetails: {short_desc}" if description else ""))
     
     try:
         # Use notify-send to display desktop notification
@@ -122,38 +153,112 @@ def send_notification(event):
         logging.error(f"Failed to send notification: {e}")
         return False
 
+def _notified_events_file_version():
+    """Return the (mtime, size) pair identifying the notified events file content, or None if it is missing"""
+    try:
+        stat = os.stat(NOTIFIED_EVENTS_FILE)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
 def load_notified_events():
     """Load previously notified events from file"""
+    global _notified_events_cache
+    if os.path.exists(LEGACY_NOTIFIED_EVENTS_FILE):
+        _import_legacy_notified_events()
     try:
-        if os.path.exists(NOTIFIED_EVENTS_FILE):
+        version = _notified_events_file_version()
+        if version is None:
+            return {}
+        if _notified_events_cache is None or _notified_events_cache[0] != version:
             with open(NOTIFIED_EVENTS_FILE, 'r') as f:
-                return json.load(f)
+                notified_events = dict(line.rstrip('\n').split('\t', 1) for line in f if '\t' in line)
+            # Timestamps are epoch seconds; skip lines damaged by an interrupted write
+            _notified_events_cache = (version, {event_id: int(timestamp)
+                                                for event_id, timestamp in notified_events.items()
+                                                if timestamp.isdecimal()})
+        # Callers modify the returned dict, so hand out a copy
+        return dict(_notified_events_cache[1])
     except Exception as e:
         logging.warning(f"Error loading notified events: {e}")
     return {}
 
-def save_notified_events(notified_events):
-    """Save notified events to file"""
+def _import_legacy_notified_events():
+    """Move the events from the JSON file written by older versions into the notified events file"""
+    try:
+        with open(LEGACY_NOTIFIED_EVENTS_FILE, 'r') as f:
+            legacy_events = json.load(f)
+        notified_events = {_escape_separators(event_id): _migrate_timestamp(timestamp)
+                           for event_id, timestamp in legacy_events.items()}
+    except Exception as e:
+        logging.warning(f"Error loading legacy notified events: {e}")
+        notified_events = {}
+    if _write_notified_events(notified_events, 'a'):
+        try:
+            os.remove(LEGACY_NOTIFIED_EVENTS_FILE)
+        except OSError as e:
+            logging.warning(f"Error removing legacy notified events: {e}")
+
+def _migrate_timestamp(timestamp):
+    """Convert an ISO timestamp from the legacy JSON file to epoch seconds"""
+    try:
+        return int(datetime.fromisoformat(timestamp).timestamp())
+    except (ValueError, TypeError):
+        # Unreadable timestamps expire on the next clean up
+        return 0
+
+def _write_notified_events(notified_events, mode):
+    """
+    Write notified events to file as event_id<TAB>timestamp lines
+    
+    Returns:
+        True if the events were written
+    """
+    global _notified_events_cache
     try:
         # Ensure directory exists
         os.makedirs(os.path.dirname(NOTIFIED_EVENTS_FILE), exist_ok=True)
-        with open(NOTIFIED_EVENTS_FILE, 'w') as f:
-            json.dump(notified_events, f)
+        cache = _notified_events_cache
+        if mode == 'a' and (cache is None or cache[0] != _notified_events_file_version()):
+            # The cache does not reflect the file being appended to
+            cache = None
+        with open(NOTIFIED_EVENTS_FILE, mode) as f:
+            f.writelines(f"{event_id}\t{timestamp}\n" for event_id, timestamp in notified_events.items())
+        # Keep the cache in sync with what was written instead of reading the file again
+        if mode == 'w':
+            _notified_events_cache = (_notified_events_file_version(), dict(notified_events))
+        elif cache is not None:
+            cache[1].update(notified_events)
+            _notified_events_cache = (_notified_events_file_version(), cache[1])
+        else:
+            _notified_events_cache = None
+        return True
     except Exception as e:
+        _notified_events_cache = None
         logging.warning(f"Error saving notified events: {e}")
+        return False
+
+def append_notified_events(new_notified_events):
+    """Append newly notified events to file"""
+    if new_notified_events:
+        _write_notified_events(new_notified_events, 'a')
+
+def save_notified_events(notified_events):
+    """Save notified events to file, replacing its content"""
+    _write_notified_events(notified_events, 'w')
+
+def is_clean_up_due():
+    """Check whether the notified events file has not been modified for CLEAN_UP_INTERVAL seconds"""
+    try:
+        return os.stat(NOTIFIED_EVENTS_FILE).st_mtime < time.time() - CLEAN_UP_INTERVAL
+    except OSError:
+        # Nothing to clean up
+        return False
 
 def clean_notified_events(notified_events):
     """Remove old events from the notified events dict"""
-    cutoff_time = datetime.now() - timedelta(hours=24)
-    to_remove = []
-    
-    for event_id, timestamp_str in notified_events.items():
-        try:
-            timestamp = datetime.fromisoformat(timestamp_str)
-            if timestamp < cutoff_time:
-                to_remove.append(event_id)
-        except (ValueError, TypeError):
-            to_remove.append(event_id)
-    
-    for event_id in to_remove:
-        notified_events.pop(event_id, None)
+    cutoff_time = int(time.time()) - 24 * 60 * 60
+    live_events = {event_id: timestamp for event_id, timestamp in notified_events.items()
+                   if isinstance(timestamp, int) and timestamp >= cutoff_time}
+    notified_events.clear()
+    notified_events.update(live_events)
@@ -23,24 +23,17 @@ import argparse
 from datetime import datetime, timezone, timedelta
 from os.path import join
 
-from dateutil.relativedelta import relativedelta
 from oauth2client import client
 from oauth2client import clientsecrets
 
 # Ensure we can import from parent package
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from gcalendar import DEFAULT_CLIENT_ID, DEFAULT_CLIENT_SECRET, TOKEN_STORAGE_VERSION
+from gcalendar import DEFAULT_CLIENT_ID, DEFAULT_CLIENT_SECRET
+from gcalendar._paths import HOME_DIRECTORY, CONFIG_DIRECTORY, TOKEN_FILE_SUFFIX
 from gcalendar.gcalendar import GCalendar
 from gcalendar.notification import notify_events
 
-# The home folder
-HOME_DIRECTORY = os.environ.get('HOME') or os.path.expanduser('~')
-
-# ~/.config/gcalendar folder
-CONFIG_DIRECTORY = os.path.join(os.environ.get(
-    'XDG_CONFIG_HOME') or os.path.join(HOME_DIRECTORY, '.config'), 'gcalendar')
-
 # Ensure DISPLAY environment variable is set for notify-send
 if not os.environ.get('DISPLAY'):
     os.environ['DISPLAY'] = ':0'
@@ -57,7 +50,8 @@ if not os.environ.get('DBUS_SESSION_BUS_ADDRESS'):
         # Fallback to a common default
         os.environ['DBUS_SESSION_BUS_ADDRESS'] = 'unix:path=/run/user/1000/bus'
 
-TOKEN_FILE_SUFFIX = "_" + TOKEN_STORAGE_VERSION + ".dat"
+# The local time zone, resolved once per process
+_LOCAL_TZ = datetime.now(timezone.utc).astimezone().tzinfo
 
 def setup_logging(debug_mode):
     """Set up logging configuration"""
@@ -85,12 +79,12 @@ def get_events(account_id, client_id, client_secret, calendars, days, minutes):
             return []
         
         # Setup time range - look from now until specified minutes in the future
-        current_time = datetime.now(timezone.utc).astimezone()
-        time_zone = current_time.tzinfo
+        time_zone = _LOCAL_TZ
+        current_time = datetime.now(_LOCAL_TZ)
         
         # For checking events, we need to look ahead by days
         start_time = str(current_time.isoformat())
-        end_time = str((current_time + relativedelta(days=days)).isoformat())
+        end_time = str((current_time + timedelta(days=days)).isoformat())
         
         logging.debug(f"Checking for events between {start_time} and {end_time}")
         
@@ -107,16 +101,50 @@ def get_events(account_id, client_id, client_secret, calendars, days, minutes):
     
     return []
 
+def parse_cron_args(argv):
+    """
+    Parse the arguments written by 'gcalendar --setup-cron' without building an argparse parser
+    
+    Returns:
+        argparse.Namespace with the same defaults as main's parser, or None if argv has any other shape
+    """
+    args = argparse.Namespace(account="default", notify=15, days=1, calendar=["*"], debug=False)
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        has_value = i + 1 < len(argv) and not argv[i + 1].startswith("-")
+        if arg == "--debug":
+            args.debug = True
+            i += 1
+        elif arg == "--calendar":
+            i += 1
+            start = i
+            while i < len(argv) and not argv[i].startswith("-"):
+                i += 1
+            args.calendar = argv[start:i]
+        elif arg == "--account" and has_value:
+            args.account = argv[i + 1]
+            i += 2
+        elif arg in ("--notify", "--days") and has_value and argv[i + 1].isdecimal():
+            setattr(args, arg[2:], int(argv[i + 1]))
+            i += 2
+        else:
+            return None
+    return args
+
 def main():
     """Main function for the cron job notification script"""
-    parser = argparse.ArgumentParser(description="GCalendar notification cron job")
-    parser.add_argument("--account", type=str, default="default", help="account ID")
-    parser.add_argument("--notify", type=int, default=15, help="minutes before event to notify")
-    parser.add_argument("--days", type=int, default=1, help="days to look ahead for events")
-    parser.add_argument("--calendar", type=str, default=["*"], nargs="*", help="specific calendars to check")
-    parser.add_argument("--debug", action="store_true", help="enable debug logging")
-    
-    args = parser.parse_args()
+    # Cron runs this script every few minutes, so try the cheap parser first
+    args = parse_cron_args(sys.argv[1:])
+    if args is None:
+        parser = argparse.ArgumentParser(description="GCalendar notification cron job")
+        parser.add_argument("--account", type=str, default="default", help="account ID")
+        parser.add_argument("--notify", type=int, default=15, help="minutes before event to notify")
+        parser.add_argument("--days", type=int, default=1, help="days to look ahead for events")
+        parser.add_argument("--calendar", type=str, default=["*"], nargs="*", help="specific calendars to check")
+        parser.add_argument("--debug", action="store_true", help="enable debug logging")
+        
+        args = parser.parse_args()
     
     # Set up logging
     setup_logging(args.debug)